@@ -1,14 +1,10 @@
-import json
-import pandas as pd
+from io_utils import as_categorical, load_records
 
-# Load the cleaned JSON
-with open("/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/merged_consar_data_cleaned.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-df = pd.DataFrame(data)
+# Load the cleaned database (uses the Parquet copy if present)
+df = load_records("/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/merged_consar_data_cleaned.json")
 
 # Filter for "Basica" records
-basica_df = df[df["Siefore"] == "Basica"]
+basica_df = as_categorical(df[df["Siefore"] == "Basica"].copy())
 
 print("=" * 60)
 print(f"Analyzing {len(basica_df)} 'Basica' records")
@@ -16,8 +12,9 @@ print("=" * 60)
 
 # Check date range
 print(f"\nDate Range:")
-print(f"  Earliest: {basica_df['PeriodYear'].min()}-{basica_df['PeriodMonth'].min()}")
-print(f"  Latest: {basica_df['PeriodYear'].max()}-{basica_df['PeriodMonth'].max()}")
+period_keys = basica_df["PeriodYear"].astype(int) * 100 + basica_df["PeriodMonth"].astype(int)
+print(f"  Earliest: {period_keys.min() // 100}-{period_keys.min() % 100:02d}")
+print(f"  Latest: {period_keys.max() // 100}-{period_keys.max() % 100:02d}")
 
 # Check concepts
 print(f"\nConcepts:")
@@ -33,5 +30,5 @@ print(basica_df.head(10).to_string(index=False))
 
 # Check specific combinations
 print(f"\nBreakdown by Afore-Concept:")
-breakdown = basica_df.groupby(["Afore", "Concept"]).size().reset_index(name="Count")
+breakdown = basica_df.groupby(["Afore", "Concept"], observed=True).size().reset_index(name="Count")
 print(breakdown.to_string(index=False))
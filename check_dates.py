@@ -1,21 +1,22 @@
-import json
 import pandas as pd
 
-# Load the rebuilt JSON
-with open("/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/consar_siefores_full.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
+from io_utils import as_categorical, load_records, read_report
 
-df = pd.DataFrame(data)
+# Load the rebuilt database (uses the Parquet copy if present)
+df = as_categorical(load_records("/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/consar_siefores_full.json"))
 
 # Check date range by Siefore
 print("=" * 70)
 print("Date Range by Siefore")
 print("=" * 70)
 
-for siefore in sorted(df["Siefore"].unique()):
-    siefore_df = df[df["Siefore"] == siefore]
-    min_date = f"{siefore_df['PeriodYear'].min()}-{siefore_df['PeriodMonth'].min()}"
-    max_date = f"{siefore_df['PeriodYear'].max()}-{siefore_df['PeriodMonth'].max()}"
+# Compare full periods (YYYYMM) so the earliest/latest month belongs to the right year
+period_keys = df["PeriodYear"].astype(int) * 100 + df["PeriodMonth"].astype(int)
+date_ranges = period_keys.groupby(df["Siefore"], observed=True).agg(["min", "max"])
+for siefore in sorted(date_ranges.index):
+    first, last = date_ranges.loc[siefore]
+    min_date = f"{first // 100}-{first % 100:02d}"
+    max_date = f"{last // 100}-{last % 100:02d}"
     print(f"{siefore:12} : {min_date} to {max_date}")
 
 # Check the latest dates in detail
@@ -23,8 +24,8 @@ print("\n" + "=" * 70)
 print("Records from 2025 by Siefore and Month")
 print("=" * 70)
 
-df_2025 = df[df["PeriodYear"] == "2025"]
-breakdown = df_2025.groupby(["Siefore", "PeriodMonth"]).size().reset_index(name="Count")
+df_2025 = df[df["PeriodYear"] == 2025]
+breakdown = df_2025.groupby(["Siefore", "PeriodMonth"], observed=True).size().reset_index(name="Count")
 breakdown_pivot = breakdown.pivot(index="Siefore", columns="PeriodMonth", values="Count").fillna(0).astype(int)
 print(breakdown_pivot)
 
@@ -33,7 +34,7 @@ print("\n" + "=" * 70)
 print("Checking dates in Reporte-18.xlsx (60-64)")
 print("=" * 70)
 
-df_test = pd.read_excel("/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/2025_10 files/Reporte-18.xlsx", header=8)
+df_test = read_report("/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/2025_10 files/Reporte-18.xlsx", header=8)
 date_cols = []
 for col in df_test.columns[4:]:
     try:
@@ -1,15 +1,22 @@
-import pandas as pd
+from itertools import islice
+
+from openpyxl import load_workbook
 
 # Check Reporte-19 which should have the most recent data
 file_path = "/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/2025_10 files/Reporte-19.xlsx"
+header_row = 8
+
+# Stream the sheet in read-only mode and stop as soon as the header row is reached
+wb = load_workbook(file_path, read_only=True, data_only=True)
+headers = next(islice(wb.worksheets[0].iter_rows(values_only=True), header_row, header_row + 1))
+wb.close()
 
-df = pd.read_excel(file_path, header=8)
 print("=" * 70)
 print("Column headers from Reporte-19.xlsx (60-64)")
 print("=" * 70)
 
 # Get all columns from position 4 onwards
-date_columns = df.columns[4:]
+date_columns = [col if col is not None else f"Unnamed: {i}" for i, col in enumerate(headers)][4:]
 print(f"\nTotal columns from position 4: {len(date_columns)}")
 print("\nAll date columns:")
 for i, col in enumerate(date_columns):
@@ -25,14 +25,24 @@ Concepts Extracted:
 4. Inversión en Fondos Mutuos
 """
 
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import json
+import multiprocessing
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from io_utils import read_report
+
 # === CONFIGURATION ===
 BASE_PATH = "/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/2025_10 files"
 OUTPUT_JSON_PATH = "/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/consar_siefores_full.json"
+OUTPUT_PARQUET_PATH = "/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/consar_siefores_full.parquet"
 SUMMARY_REPORT_PATH = "/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/rebuild_summary.csv"
 
 # Files are numbered 16–26 (inclusive)
@@ -57,107 +67,217 @@ CONCEPTS = [
     "Inversion en Fondos Mutuos"
 ]
 
+# Output record fields, in order
+RECORD_COLUMNS = ["Afore", "Siefore", "Concept", "PeriodYear", "PeriodMonth", "valueMXN"]
+
+# Search terms used to locate each concept row in column 1 (case-insensitive,
+# partial match for concepts with encoding issues)
+CONCEPT_SEARCH_TERMS = {
+    "Total de Activo": "Total de Activo",
+    "Inversiones Tercerizadas": "Tercerizadas",
+    "Inversion en Titulos Fiduciarios": "Fiduciarios",
+    "Inversion en Fondos Mutuos": "Fondos Mutuos"
+}
+
 # Excel file structure configuration
 HEADER_ROW = 8        # Dates start at row 8
 FIRST_VALUE_COL = 4   # Column E = index 4
 NUM_AFORES = 10       # 10 Afores per concept
 
+# Spanish month abbreviations used in some date headers (e.g., "Ago-2025")
+SPANISH_MONTHS = {
+    "Ene": "01", "Feb": "02", "Mar": "03", "Abr": "04",
+    "May": "05", "Jun": "06", "Jul": "07", "Ago": "08",
+    "Sep": "09", "Oct": "10", "Nov": "11", "Dic": "12"
+}
+SPANISH_DATE_RE = re.compile(r"(Ene|Feb|Mar|Abr|May|Jun|Jul|Ago|Sep|Oct|Nov|Dic)-(\d{4})")
+
+# Thousands separators and surrounding (incl. non-breaking) whitespace in text value cells
+NUMBER_NOISE_RE = re.compile(r",|^\s+|\s+$")
 
-def extract_siefore_data(file_path, siefore_name):
+
+def parse_period_header(col):
+    """
+    Parses a single date column header into a Timestamp.
+
+    Handles multiple formats:
+    1. Timestamp/datetime objects (already parsed by the Excel reader)
+    2. Spanish month abbreviations like "Ago-2025", "Ene-2024"
+    3. Standard datetime strings
+
+    Args:
+        col: Column header value
+
+    Returns:
+        Timestamp, or NaT if the header is not a date
+    """
+    if isinstance(col, datetime):
+        return pd.Timestamp(col)
+
+    col_str = str(col).strip()
+
+    # Check if it's in format "Ago-2025"
+    match = SPANISH_DATE_RE.fullmatch(col_str)
+    if match:
+        month = SPANISH_MONTHS[match.group(1)]
+        year = match.group(2)
+        return pd.Timestamp(f"{year}-{month}-01")
+
+    return pd.to_datetime(col_str, errors="coerce")
+
+
+def extract_siefore_data(file_path, siefore_name, log=print):
     """
     Extracts all four concepts from a single Siefore Excel file.
 
     Args:
         file_path: Path to the Excel file
         siefore_name: Name of the Siefore (e.g., "Pensiones", "60-64")
+        log: Callable receiving each warning line (default: print)
 
     Returns:
         DataFrame with extracted records
     """
     try:
-        df = pd.read_excel(file_path, header=HEADER_ROW)
+        df = read_report(file_path, header=HEADER_ROW)
     except Exception as e:
-        print(f"    ❌ Error reading {file_path}: {e}")
+        log(f"    ❌ Error reading {file_path}: {e}")
         return pd.DataFrame()
 
     df.columns = [str(c).strip() for c in df.columns]
-    all_records = []
+
+    # Parse every date header once; the value loop below indexes by position
+    headers = df.columns[FIRST_VALUE_COL:]
+    dates = [parse_period_header(col) for col in headers]
+    valid_mask = np.array([pd.notna(d) for d in dates], dtype=bool)
+    years = np.array([d.year if pd.notna(d) else 0 for d in dates], dtype="uint16")
+    months = np.array([d.month if pd.notna(d) else 0 for d in dates], dtype="uint8")
+
+    # Nothing to extract from a sheet without any date headers (corrupt/unexpected layout)
+    if not valid_mask.any():
+        log(f"    ⚠️  No valid date columns found in {file_path}. Skipping...")
+        return pd.DataFrame(columns=RECORD_COLUMNS)
+
+    # Only column 1 (names) and the date columns are needed; columns B-D and any
+    # trailing non-date columns (notes, totals) are never cleaned or scanned
+    value_idx = np.flatnonzero(valid_mask)
+    value_cols = FIRST_VALUE_COL + value_idx
+    years, months = years[value_idx], months[value_idx]
+
+    # Per-concept column chunks, concatenated into a DataFrame once at the end
+    # (each list starts with an empty array so the concatenation never fails)
+    col_afore = [np.array([], dtype=object)]
+    col_concept = [np.array([], dtype=object)]
+    col_year, col_month = [years[:0]], [months[:0]]
+    col_val = [np.array([], dtype=float)]
+
+    # Locate every concept row in a single pass over column 1
+    labels = df.iloc[:, 1].fillna("").astype(str).str.strip().str.lower()
+    concept_rows = {}
+    for row_idx, label in enumerate(labels):
+        for concept, search_term in CONCEPT_SEARCH_TERMS.items():
+            if concept not in concept_rows and search_term.lower() in label:
+                concept_rows[concept] = row_idx
 
     for concept in CONCEPTS:
-        # Find row containing the concept (case-insensitive, partial match for encoding issues)
-        # Use different search terms for concepts with encoding issues
-        if "Fiduciarios" in concept:
-            concept_search = "Fiduciarios"
-        elif "Fondos Mutuos" in concept:
-            concept_search = "Fondos Mutuos"
-        elif "Tercerizadas" in concept:
-            concept_search = "Tercerizadas"
-        else:
-            concept_search = concept
-
-        concept_idx = df[df.iloc[:, 1].astype(str).str.contains(concept_search, case=False, na=False)]
-
-        if concept_idx.empty:
-            print(f"    ⚠️  Concept '{concept}' not found in {siefore_name}. Skipping...")
+        concept_row = concept_rows.get(concept)
+
+        if concept_row is None:
+            log(f"    ⚠️  Concept '{concept}' not found in {siefore_name}. Skipping...")
             continue
 
-        concept_row = concept_idx.index[0]
         afore_block = df.iloc[concept_row + 1 : concept_row + 1 + NUM_AFORES, :]
         afore_names = afore_block.iloc[:, 1].fillna("").str.strip()
 
-        # Loop through all Afores and months
-        for i, afore in enumerate(afore_names):
-            if not afore or afore == "nan":
-                continue
+        # Clean the whole value block in one pass and convert to pesos
+        vals_num = parse_values_mxn(afore_block.iloc[:, value_cols])
+
+        # Emit every (Afore, month) cell of the block at once: skip rows without
+        # an Afore name, repeat names across months and tile months across Afores
+        has_name = ((afore_names != "") & (afore_names != "nan")).to_numpy()
+        names = afore_names.to_numpy(dtype=object)[has_name]
+        n_cols = len(years)
+
+        col_afore.append(np.repeat(names, n_cols))
+        col_concept.append(np.full(len(names) * n_cols, concept, dtype=object))
+        col_year.append(np.tile(years, len(names)))
+        col_month.append(np.tile(months, len(names)))
+        col_val.append(vals_num[has_name].ravel())
+
+    # Afore/Siefore/Concept have only a handful of distinct values
+    afores = np.concatenate(col_afore)
+    return pd.DataFrame({
+        "Afore": pd.Categorical(afores),
+        "Siefore": pd.Categorical(np.full(len(afores), siefore_name, dtype=object)),
+        "Concept": pd.Categorical(np.concatenate(col_concept)),
+        "PeriodYear": np.concatenate(col_year),
+        "PeriodMonth": np.concatenate(col_month),
+        "valueMXN": np.concatenate(col_val)
+    })
+
+
+def _extract_siefore_worker(file_path, siefore_name):
+    """
+    Worker-process entry point: extracts a Siefore file and collects its warnings.
+
+    The warnings are returned instead of printed, so the parent can show them
+    under the matching "Processing" line.
 
-            row = afore_block.iloc[i, FIRST_VALUE_COL:]
+    Args:
+        file_path: Path to the Excel file
+        siefore_name: Name of the Siefore (e.g., "Pensiones", "60-64")
 
-            for col, val in row.items():
-                # Parse date - handles multiple formats:
-                # 1. Pandas Timestamp objects (already parsed)
-                # 2. Spanish month abbreviations like "Ago-2025", "Ene-2024"
-                # 3. Standard datetime strings
-                if isinstance(col, pd.Timestamp):
-                    date = col
-                else:
-                    col_str = str(col).strip()
-
-                    # Handle Spanish month abbreviations
-                    spanish_months = {
-                        "Ene": "01", "Feb": "02", "Mar": "03", "Abr": "04",
-                        "May": "05", "Jun": "06", "Jul": "07", "Ago": "08",
-                        "Sep": "09", "Oct": "10", "Nov": "11", "Dic": "12"
-                    }
-
-                    # Check if it's in format "Ago-2025"
-                    if "-" in col_str and len(col_str.split("-")) == 2:
-                        parts = col_str.split("-")
-                        if parts[0] in spanish_months and len(parts[1]) == 4:
-                            month = spanish_months[parts[0]]
-                            year = parts[1]
-                            date = pd.Timestamp(f"{year}-{month}-01")
-                        else:
-                            date = pd.to_datetime(col_str, errors="coerce")
-                    else:
-                        date = pd.to_datetime(col_str, errors="coerce")
-
-                if pd.notna(date):
-                    val_str = str(val).replace(",", "").strip()
-                    try:
-                        value_mxn = float(val_str) * 1000 if val_str not in ["N/A", "-", "", "nan", "None"] else 0.0
-                    except Exception:
-                        value_mxn = 0.0
-
-                    all_records.append({
-                        "Afore": afore,
-                        "Siefore": siefore_name,
-                        "Concept": concept,
-                        "PeriodYear": str(date.year),
-                        "PeriodMonth": str(date.month).zfill(2),
-                        "valueMXN": value_mxn
-                    })
+    Returns:
+        Tuple of (DataFrame with extracted records, list of warning lines)
+    """
+    messages = []
+    df = extract_siefore_data(file_path, siefore_name, log=messages.append)
+    return df, messages
+
+
+def parse_values_mxn(block):
+    """
+    Converts a block of reported values (thousands of pesos) to pesos.
+
+    Text cells have thousands separators and surrounding whitespace (including
+    non-breaking spaces) removed before conversion; numeric cells are used as-is,
+    never round-tripped through strings. Placeholders ("N/A", "-", blanks) become 0.
+
+    Args:
+        block: DataFrame slice holding only value columns
 
-    return pd.DataFrame(all_records)
+    Returns:
+        float ndarray with the same shape as the block
+    """
+    cells = pd.Series(block.to_numpy(dtype=object).ravel())
+    values = pd.to_numeric(cells, errors="coerce").astype(float)
+
+    # Only the text cells that did not parse as-is need cleaning
+    needs_cleaning = (values.isna() & cells.notna()).to_numpy()
+    if needs_cleaning.any():
+        text = cells[needs_cleaning].astype(str).str.replace(NUMBER_NOISE_RE, "", regex=True)
+        values[needs_cleaning] = pd.to_numeric(text, errors="coerce").to_numpy()
+
+    return values.fillna(0.0).to_numpy().reshape(block.shape) * 1000.0
+
+
+def write_json_records(json_file, df):
+    """
+    Appends a DataFrame's records to a JSON array that is being streamed to disk.
+
+    The caller writes the opening "[", the "," separators between chunks and the
+    closing "]"; the result matches a single orjson.dumps(..., OPT_INDENT_2) call.
+
+    Args:
+        json_file: Binary file handle opened for writing
+        df: DataFrame whose records should be appended
+    """
+    payload = orjson.dumps(
+        df.to_dict(orient="records"),
+        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    )
+    # Strip the enclosing "[\n" and "\n]" so chunks can be joined with ",\n"
+    json_file.write(payload[2:-2])
 
 
 def main():
@@ -167,51 +287,128 @@ def main():
     print("=" * 70)
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
-    # === MAIN LOOP: PROCESS ALL FILES ===
-    all_dataframes = []
+    # === PARSE ALL FILES IN PARALLEL ===
+    # Each workbook is independent, so they are read in separate worker processes
+    file_paths = {
+        report_num: os.path.join(BASE_PATH, f"Reporte-{report_num}.xlsx")
+        for report_num in SIEFORE_MAP
+    }
+    tasks = [
+        (report_num, siefore_name)
+        for report_num, siefore_name in sorted(SIEFORE_MAP.items())
+        if os.path.exists(file_paths[report_num])
+    ]
+
+    # === MAIN LOOP: STREAM RESULTS TO DISK IN REPORT ORDER ===
+    # Each file's records are appended to the JSON and Parquet outputs as soon as
+    # they are consumed, instead of keeping every DataFrame for a final concat.
+    # Both are written to temporary files and only replace the previous outputs
+    # once every file has been processed, so a failed run leaves them untouched.
+    json_tmp_path = OUTPUT_JSON_PATH + ".tmp"
+    parquet_tmp_path = OUTPUT_PARQUET_PATH + ".tmp"
     file_summary = []
-
-    for report_num, siefore_name in sorted(SIEFORE_MAP.items()):
-        file_path = os.path.join(BASE_PATH, f"Reporte-{report_num}.xlsx")
-
-        if not os.path.exists(file_path):
-            print(f"⚠️  File not found: {file_path}")
-            file_summary.append({
-                "Report_Number": report_num,
-                "Siefore": siefore_name,
-                "Status": "File Not Found",
-                "Records_Extracted": 0
-            })
-            continue
-
-        print(f"🔹 Processing {siefore_name:12} from Reporte-{report_num}.xlsx...")
-        df_siefore = extract_siefore_data(file_path, siefore_name)
-        records_count = len(df_siefore)
-        print(f"   ➜ {records_count:,} records extracted.")
-
-        all_dataframes.append(df_siefore)
-        file_summary.append({
-            "Report_Number": report_num,
-            "Siefore": siefore_name,
-            "Status": "Success",
-            "Records_Extracted": records_count
-        })
-
-    # === COMBINE ALL INTO ONE MASTER DATAFRAME ===
-    if not all_dataframes:
+    siefore_counts = {}
+    concept_counts = {}
+    afores = set()
+    periods = set()
+    json_file = None
+    parquet_writer = None
+    completed = False
+
+    max_workers = max(1, min(len(tasks), os.cpu_count() or 1))
+    # "spawn" workers: the pipeline runs this step in a thread next to the FX fetch,
+    # and forking a multi-threaded process can deadlock the children
+    mp_context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+            extracted = executor.map(
+                _extract_siefore_worker,
+                [file_paths[report_num] for report_num, _ in tasks],
+                [siefore_name for _, siefore_name in tasks]
+            )
+            # executor.map yields in task order, i.e. sorted report order
+            found_reports = {report_num for report_num, _ in tasks}
+
+            for report_num, siefore_name in sorted(SIEFORE_MAP.items()):
+                file_path = file_paths[report_num]
+
+                if report_num not in found_reports:
+                    print(f"⚠️  File not found: {file_path}")
+                    file_summary.append({
+                        "Report_Number": report_num,
+                        "Siefore": siefore_name,
+                        "Status": "File Not Found",
+                        "Records_Extracted": 0
+                    })
+                    continue
+
+                print(f"🔹 Processing {siefore_name:12} from Reporte-{report_num}.xlsx...")
+                df_siefore, messages = next(extracted)
+                for message in messages:
+                    print(message)
+                records_count = len(df_siefore)
+                print(f"   ➜ {records_count:,} records extracted.")
+
+                file_summary.append({
+                    "Report_Number": report_num,
+                    "Siefore": siefore_name,
+                    "Status": "Success",
+                    "Records_Extracted": records_count
+                })
+
+                if records_count == 0:
+                    continue
+
+                # Open both outputs lazily; the Parquet schema comes from the first chunk
+                table = pa.Table.from_pandas(
+                    df_siefore,
+                    schema=parquet_writer.schema if parquet_writer else None,
+                    preserve_index=False
+                )
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(parquet_tmp_path, table.schema, compression="zstd")
+                    json_file = open(json_tmp_path, "wb")
+                    json_file.write(b"[\n")
+                else:
+                    json_file.write(b",\n")
+                parquet_writer.write_table(table)
+                write_json_records(json_file, df_siefore)
+
+                # Accumulate the final statistics
+                siefore_counts[siefore_name] = siefore_counts.get(siefore_name, 0) + records_count
+                for concept, count in df_siefore["Concept"].value_counts().items():
+                    concept_counts[concept] = concept_counts.get(concept, 0) + count
+                afores.update(df_siefore["Afore"].unique())
+                periods.update(
+                    df_siefore[["PeriodYear", "PeriodMonth"]].drop_duplicates().itertuples(index=False, name=None)
+                )
+        completed = True
+    finally:
+        if json_file is not None:
+            if completed:
+                json_file.write(b"\n]")
+            json_file.close()
+        if parquet_writer is not None:
+            parquet_writer.close()
+        if not completed:
+            for tmp_path in (json_tmp_path, parquet_tmp_path):
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    if parquet_writer is None:
         print("\n❌ No data extracted — check file paths or structure.")
         return
 
-    print("\n" + "=" * 70)
-    print("Combining all data sources...")
-    print("=" * 70)
-
-    full_df = pd.concat(all_dataframes, ignore_index=True)
+    # Swap the finished files into place (the Parquet copy last, so it is never
+    # older than the JSON it mirrors)
+    os.replace(json_tmp_path, OUTPUT_JSON_PATH)
+    os.replace(parquet_tmp_path, OUTPUT_PARQUET_PATH)
 
-    # === SAVE OUTPUT ===
-    print(f"\nSaving complete database to: {OUTPUT_JSON_PATH}")
-    full_df.to_json(OUTPUT_JSON_PATH, orient="records", indent=2, force_ascii=False)
+    print(f"\nSaved complete database to: {OUTPUT_JSON_PATH}")
     print("  ✓ JSON saved successfully")
+    # Typed, compressed copy for downstream scripts (much faster to reload than JSON)
+    print(f"Saved Parquet copy to: {OUTPUT_PARQUET_PATH}")
+    print("  ✓ Parquet saved successfully")
 
     # === GENERATE SUMMARY ===
     summary_df = pd.DataFrame(file_summary)
@@ -223,21 +420,21 @@ def main():
     print("\n" + "=" * 70)
     print("REBUILD COMPLETE!")
     print("=" * 70)
-    print(f"Total Records:        {len(full_df):,}")
-    print(f"Unique Afores:        {full_df['Afore'].nunique()}")
-    print(f"Unique Siefores:      {full_df['Siefore'].nunique()}")
-    print(f"Unique Concepts:      {full_df['Concept'].nunique()}")
-    print(f"Date Range:           {full_df['PeriodYear'].min()}-{full_df['PeriodMonth'].min()} to {full_df['PeriodYear'].max()}-{full_df['PeriodMonth'].max()}")
+    print(f"Total Records:        {sum(siefore_counts.values()):,}")
+    print(f"Unique Afores:        {len(afores)}")
+    print(f"Unique Siefores:      {len(siefore_counts)}")
+    print(f"Unique Concepts:      {len(concept_counts)}")
+    first_year, first_month = min(periods)
+    last_year, last_month = max(periods)
+    print(f"Date Range:           {first_year}-{first_month:02d} to {last_year}-{last_month:02d}")
 
     print("\nSiefores included:")
-    for siefore in sorted(full_df["Siefore"].unique()):
-        count = len(full_df[full_df["Siefore"] == siefore])
-        print(f"  • {siefore:12} : {count:,} records")
+    for siefore in sorted(siefore_counts):
+        print(f"  • {siefore:12} : {siefore_counts[siefore]:,} records")
 
     print("\nConcepts included:")
-    for concept in sorted(full_df["Concept"].unique()):
-        count = len(full_df[full_df["Concept"] == concept])
-        print(f"  • {concept:40} : {count:,} records")
+    for concept in sorted(concept_counts):
+        print(f"  • {concept:40} : {concept_counts[concept]:,} records")
 
     print(f"\nCompleted at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
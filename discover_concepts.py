@@ -1,22 +1,25 @@
-import pandas as pd
+from openpyxl import load_workbook
 
 # === CONFIGURATION ===
 file_path = "/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/2025_10 files/Reporte-16.xlsx"
 header_row = 8
 
 # === READ FILE ===
-df = pd.read_excel(file_path, header=header_row)
-df.columns = [str(c).strip() for c in df.columns]
-
-# Look at column 1 (index 1) which contains the concept names
-concepts_col = df.iloc[:, 1].astype(str).str.strip()
+# Only column 1 (index 1, Excel column B) holds the concept names, so stream just
+# that column in read-only mode instead of loading the whole sheet
+wb = load_workbook(file_path, read_only=True, data_only=True)
+concepts_col = [
+    str(value).strip()
+    for (value,) in wb.worksheets[0].iter_rows(min_row=header_row + 2, min_col=2, max_col=2, values_only=True)
+    if value is not None
+]
+wb.close()
 
 # Filter for potential concept rows (not NaN, not empty, looks like a concept)
-potential_concepts = concepts_col[
-    (concepts_col != "nan") &
-    (concepts_col != "") &
-    (~concepts_col.str.startswith("Unnamed"))
-].unique()
+potential_concepts = list(dict.fromkeys(
+    c for c in concepts_col
+    if c != "nan" and c != "" and not c.startswith("Unnamed")
+))
 
 print("=" * 60)
 print("All unique entries in column 1 (potential concepts):")
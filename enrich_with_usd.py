@@ -13,11 +13,13 @@ Output:
 - consar_siefores_with_usd.json: Enriched database with FX_EOM and valueUSD fields
 """
 
-import pandas as pd
-import json
+import numpy as np
+import orjson
 import os
 from datetime import datetime
 
+from io_utils import load_records
+
 class USDEnrichmentAgent:
     """Agent to enrich Afore data with USD values."""
 
@@ -47,22 +49,18 @@ class USDEnrichmentAgent:
         """
         print("Loading data files...")
 
-        # Load Afore database
-        if not os.path.exists(self.afore_data_path):
+        # Load Afore database (uses the Parquet copy written by the rebuild step if present)
+        try:
+            afore_df = load_records(self.afore_data_path)
+        except FileNotFoundError:
             raise FileNotFoundError(f"Afore database not found: {self.afore_data_path}")
-
-        with open(self.afore_data_path, "r", encoding="utf-8") as f:
-            afore_data = json.load(f)
-        afore_df = pd.DataFrame(afore_data)
         print(f"  -> Loaded {len(afore_df):,} Afore records")
 
         # Load FX data
-        if not os.path.exists(self.fx_data_path):
+        try:
+            fx_df = load_records(self.fx_data_path)
+        except FileNotFoundError:
             raise FileNotFoundError(f"FX data not found: {self.fx_data_path}")
-
-        with open(self.fx_data_path, "r", encoding="utf-8") as f:
-            fx_data = json.load(f)
-        fx_df = pd.DataFrame(fx_data)
         print(f"  -> Loaded {len(fx_df):,} FX rates")
 
         # Validate required columns
@@ -76,6 +74,12 @@ class USDEnrichmentAgent:
         if missing_cols:
             raise ValueError(f"Missing required columns in FX data: {missing_cols}")
 
+        # Single integer join key (YYYYMM) instead of two string columns
+        for df in (afore_df, fx_df):
+            df["PeriodKey"] = (
+                df["PeriodYear"].astype(int) * 100 + df["PeriodMonth"].astype(int)
+            ).astype("int32")
+
         return afore_df, fx_df
 
     def merge_fx_data(self, afore_df, fx_df):
@@ -93,12 +97,10 @@ class USDEnrichmentAgent:
 
         initial_count = len(afore_df)
 
-        # Merge on PeriodYear and PeriodMonth
-        merged_df = afore_df.merge(
-            fx_df,
-            on=["PeriodYear", "PeriodMonth"],
-            how="left"
-        )
+        # FX data has one row per period, so a dict lookup on the integer
+        # PeriodKey (YYYYMM) replaces a full merge
+        fx_map = dict(zip(fx_df["PeriodKey"], fx_df["FX_EOM"]))
+        merged_df = afore_df.assign(FX_EOM=afore_df["PeriodKey"].map(fx_map)).drop(columns="PeriodKey")
 
         # Check for records without FX data
         missing_fx = merged_df["FX_EOM"].isna().sum()
@@ -109,7 +111,7 @@ class USDEnrichmentAgent:
             missing_periods = merged_df[merged_df["FX_EOM"].isna()][["PeriodYear", "PeriodMonth"]].drop_duplicates()
             print(f"     Missing FX for {len(missing_periods)} periods:")
             for _, row in missing_periods.head(10).iterrows():
-                print(f"       - {row['PeriodYear']}-{row['PeriodMonth']}")
+                print(f"       - {int(row['PeriodYear'])}-{int(row['PeriodMonth']):02d}")
             if len(missing_periods) > 10:
                 print(f"       ... and {len(missing_periods) - 10} more")
 
@@ -129,18 +131,22 @@ class USDEnrichmentAgent:
         """
         print("\nCalculating USD values...")
 
-        # Calculate USD values (valueUSD = valueMXN / FX_EOM)
-        df["valueUSD"] = df["valueMXN"] / df["FX_EOM"]
+        # Calculate USD values (valueUSD = valueMXN / FX_EOM); the summary
+        # statistics reuse the same NumPy arrays instead of re-reading columns
+        mxn = df["valueMXN"].to_numpy(dtype=float)
+        fx = df["FX_EOM"].to_numpy(dtype=float)
+        usd = mxn / fx
+        df["valueUSD"] = usd
 
-        # Count valid calculations
-        valid_usd = df["valueUSD"].notna().sum()
+        # Count valid calculations (NaN where FX data is missing)
+        valid_usd = int(np.count_nonzero(~np.isnan(usd)))
         print(f"  -> Calculated USD values for {valid_usd:,} records")
 
         # Show some statistics
         if valid_usd > 0:
-            total_mxn = df["valueMXN"].sum()
-            avg_fx = df["FX_EOM"].mean()
-            total_usd = df["valueUSD"].sum()
+            total_mxn = np.nansum(mxn)
+            avg_fx = np.nanmean(fx)
+            total_usd = np.nansum(usd)
 
             print(f"\nSummary Statistics:")
             print(f"  Total valueMXN: ${total_mxn:,.0f}")
@@ -187,7 +193,9 @@ class USDEnrichmentAgent:
         os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
 
         # Save to JSON
-        df.to_json(self.output_path, orient="records", indent=2, force_ascii=False)
+        records = df.to_dict(orient="records")
+        with open(self.output_path, "wb") as f:
+            f.write(orjson.dumps(records, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
         file_size = os.path.getsize(self.output_path) / (1024 * 1024)
         print(f"  ✓ Saved {len(df):,} records")
@@ -210,13 +218,14 @@ class USDEnrichmentAgent:
         print(f"Records with USD values: {df['valueUSD'].notna().sum():,}")
 
         # Date range
-        min_date = f"{df['PeriodYear'].min()}-{df['PeriodMonth'].min()}"
-        max_date = f"{df['PeriodYear'].max()}-{df['PeriodMonth'].max()}"
+        period_keys = df["PeriodYear"].astype(int) * 100 + df["PeriodMonth"].astype(int)
+        min_date = f"{period_keys.min() // 100}-{period_keys.min() % 100:02d}"
+        max_date = f"{period_keys.max() // 100}-{period_keys.max() % 100:02d}"
         print(f"\nDate Range: {min_date} to {max_date}")
 
         # By Siefore
         print(f"\nRecords by Siefore:")
-        siefore_counts = df.groupby("Siefore").size().sort_values(ascending=False)
+        siefore_counts = df.groupby("Siefore", observed=True).size().sort_values(ascending=False)
         for siefore, count in siefore_counts.items():
             print(f"  • {siefore:12} : {count:,} records")
 
@@ -13,13 +13,61 @@ Output:
 - fx_data.json: Monthly end-of-month exchange rates
 """
 
-import requests
-import pandas as pd
-import json
+import orjson
 from datetime import datetime
 import os
 import time
 
+# Default for should_refresh(): None already means "no cached file"
+_AGE_NOT_GIVEN = object()
+
+
+def parse_ddmmyyyy(fechas):
+    """
+    Parse Banxico "dd/mm/yyyy" date strings without going through strptime.
+
+    Digits of 10-character strings are read straight from a character array and
+    combined into datetime64 values; impossible dates (e.g. 31/02, year 0000)
+    become NaT. Strings of any other length or not in the zero-padded layout fall
+    back to pd.to_datetime.
+
+    Args:
+        fechas: Array-like of date strings
+
+    Returns:
+        numpy datetime64[D] array (NaT for unparseable dates)
+    """
+    import numpy as np
+    import pandas as pd
+
+    # No fixed width here: a "U10" array would silently truncate longer strings
+    fechas = np.asarray(fechas, dtype=str)
+    chars = fechas.astype("U10").view("U1").reshape(len(fechas), 10)
+    digits = chars[:, [0, 1, 3, 4, 6, 7, 8, 9]]
+    fast = (
+        (np.char.str_len(fechas) == 10)
+        & (chars[:, 2] == "/") & (chars[:, 5] == "/")
+        & ((digits >= "0") & (digits <= "9")).all(axis=1)
+    )
+
+    d = np.where(fast[:, None], digits.view(np.uint32) - ord("0"), 0).astype(np.int64)
+    day = d[:, 0] * 10 + d[:, 1]
+    month = d[:, 2] * 10 + d[:, 3]
+    year = d[:, 4] * 1000 + d[:, 5] * 100 + d[:, 6] * 10 + d[:, 7]
+
+    month_start = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    dates = month_start + (day - 1).astype("timedelta64[D]")
+    valid = fast & (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (dates.astype("datetime64[M]") == month_start)
+    dates[~valid] = np.datetime64("NaT")
+
+    slow = ~fast
+    if slow.any():
+        parsed = pd.to_datetime(fechas[slow], format="%d/%m/%Y", errors="coerce")
+        dates[slow] = parsed.to_numpy().astype("datetime64[D]")
+
+    return dates
+
+
 class BanxicoFXAgent:
     """Agent to scrape and process Banxico FX data."""
 
@@ -37,30 +85,96 @@ class BanxicoFXAgent:
         self.token = token or os.environ.get("BANXICO_TOKEN")
         self.output_path = output_path
         self.cache_hours = cache_hours
+        self._session = None
+        self._dir_ensured = False
 
-    def should_refresh(self):
-        """Check if cached data needs refreshing."""
-        if not os.path.exists(self.output_path):
-            return True
+    @property
+    def session(self):
+        """
+        Pooled HTTP session (with retries on transient errors), reused across calls.
 
-        file_age_hours = (time.time() - os.path.getmtime(self.output_path)) / 3600
-        return file_age_hours > self.cache_hours
+        Created on first use so a cache hit never imports requests.
+        """
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            self._session = requests.Session()
+            self._session.headers.update({"Accept": "application/json"})
+            retries = Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                raise_on_status=False
+            )
+            self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retries))
+        return self._session
+
+    def close(self):
+        """Close the pooled HTTP session."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _stat_age(self):
+        """Return the age of the cached output in hours, or None if it does not exist."""
+        try:
+            mtime = os.stat(self.output_path).st_mtime
+        except FileNotFoundError:
+            return None
+        return (time.time() - mtime) / 3600
+
+    def should_refresh(self, age_hours=_AGE_NOT_GIVEN):
+        """Check if cached data needs refreshing (age_hours from _stat_age, if already known)."""
+        if age_hours is _AGE_NOT_GIVEN:
+            age_hours = self._stat_age()
+        return age_hours is None or age_hours > self.cache_hours
+
+    def load_cached(self):
+        """
+        Load the previously saved monthly FX data, if usable for an incremental refresh.
 
-    def fetch_data(self):
+        Returns:
+            DataFrame with PeriodYear, PeriodMonth, and FX_EOM columns, or None if the
+            cache is missing, empty, or unreadable
+        """
+        from io_utils import load_records
+
+        try:
+            cached = load_records(self.output_path)
+        except (OSError, TypeError, ValueError):
+            return None
+
+        if cached.empty or not {"PeriodYear", "PeriodMonth", "FX_EOM"}.issubset(cached.columns):
+            return None
+
+        return cached[["PeriodYear", "PeriodMonth", "FX_EOM"]].astype({"PeriodYear": str, "PeriodMonth": str})
+
+    def fetch_data(self, start_date=None):
         """
         Download Banxico FX data from API.
 
+        Args:
+            start_date: If given, only request observations from this date to today
+
         Returns:
-            DataFrame with raw FX data
+            List of raw {"fecha", "dato"} records
 
         Raises:
             ValueError: If API request fails or returns invalid data
         """
+        import requests
+
         print("Fetching FX data from Banxico SIE API...")
 
-        headers = {
-            "Accept": "application/json"
-        }
+        headers = {}
 
         # Add token to headers if available
         if self.token:
@@ -70,8 +184,13 @@ class BanxicoFXAgent:
             print("  ⚠️  No API token provided - API may require authentication")
             print("     Set BANXICO_TOKEN environment variable or use --token parameter")
 
+        url = self.api_url
+        if start_date is not None:
+            url = f"{self.api_url}/{start_date:%Y-%m-%d}/{datetime.now():%Y-%m-%d}"
+            print(f"  Requesting observations since {start_date:%Y-%m-%d}")
+
         try:
-            response = requests.get(self.api_url, headers=headers, timeout=30)
+            response = self.session.get(url, headers=headers, timeout=30)
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
             if response.status_code == 401:
@@ -85,61 +204,92 @@ class BanxicoFXAgent:
             raise ValueError(f"Error fetching FX data from Banxico: {e}")
 
         try:
-            data = response.json()
+            data = orjson.loads(response.content)
             series_data = data["bmx"]["series"][0]["datos"]
             print(f"  -> Received {len(series_data)} data points from Banxico")
-        except (KeyError, IndexError, json.JSONDecodeError) as e:
+        except (KeyError, IndexError, orjson.JSONDecodeError) as e:
             raise ValueError(f"Invalid response format from Banxico API: {e}")
 
         if not series_data:
             raise ValueError("No data returned from Banxico API")
 
-        return pd.DataFrame(series_data)
+        return series_data
 
-    def process_data(self, df):
+    def process_data(self, series_data):
         """
         Extract last valid FX rate for each month.
 
         Args:
-            df: Raw DataFrame from Banxico API
+            series_data: Raw {"fecha", "dato"} records from Banxico API
 
         Returns:
             DataFrame with PeriodYear, PeriodMonth, and FX_EOM columns
         """
+        import numpy as np
+        import pandas as pd
+
         print("Processing FX data...")
 
-        # Parse dates and convert FX rates to numeric
-        df["fecha"] = pd.to_datetime(df["fecha"], format="%d/%m/%Y", errors="coerce")
-        df["dato"] = pd.to_numeric(df["dato"], errors="coerce")
+        # Parse dates and convert FX rates to numeric straight from the raw records
+        fechas = np.array([r["fecha"] for r in series_data], dtype=str)
+        datos = np.array([r["dato"] for r in series_data], dtype=object)
+        dates = parse_ddmmyyyy(fechas)
+        values = pd.to_numeric(datos, errors="coerce")
 
         # Drop rows with invalid data
-        initial_count = len(df)
-        df = df.dropna(subset=["fecha", "dato"])
+        initial_count = len(series_data)
+        df = pd.DataFrame({"fecha": dates, "dato": values}).dropna()
         dropped = initial_count - len(df)
         if dropped > 0:
             print(f"  -> Dropped {dropped} invalid records")
 
-        # Create period columns
-        df["PeriodYear"] = df["fecha"].dt.year.astype(str)
-        df["PeriodMonth"] = df["fecha"].dt.month.astype(str).str.zfill(2)
+        # Get last (most recent) FX rate for each month: after sorting by date,
+        # the last row per month key (months since 1970-01) is the end-of-month rate
+        ym = df["fecha"].to_numpy().astype("datetime64[M]").astype("int64")
+        df_sorted = df.assign(_ym=ym).sort_values("fecha")
+        df_eom = df_sorted.drop_duplicates(subset="_ym", keep="last")
 
-        # Get last (most recent) FX rate for each month
-        df_sorted = df.sort_values("fecha")
-        df_eom = df_sorted.groupby(["PeriodYear", "PeriodMonth"]).tail(1)
+        # Create period columns from the month key
+        months = df_eom["_ym"].to_numpy()
+        df_eom = df_eom.assign(
+            PeriodYear=(months // 12 + 1970).astype(str),
+            PeriodMonth=np.char.zfill((months % 12 + 1).astype("U2"), 2),
+        )
 
-        # Select and rename columns
+        # Select and rename columns (rows are already in period order from the date sort)
         df_eom = df_eom[["PeriodYear", "PeriodMonth", "dato"]].rename(columns={"dato": "FX_EOM"})
-        df_eom = df_eom.sort_values(["PeriodYear", "PeriodMonth"]).reset_index(drop=True)
+        df_eom = df_eom.reset_index(drop=True)
 
         print(f"  -> Extracted {len(df_eom)} monthly FX rates")
 
-        # Display date range
-        min_date = f"{df_eom['PeriodYear'].min()}-{df_eom['PeriodMonth'].min()}"
-        max_date = f"{df_eom['PeriodYear'].max()}-{df_eom['PeriodMonth'].max()}"
-        print(f"  -> Date range: {min_date} to {max_date}")
+        # Display date range (first and last periods)
+        if len(df_eom):
+            first, last = df_eom.iloc[0], df_eom.iloc[-1]
+            print(f"  -> Date range: {first['PeriodYear']}-{first['PeriodMonth']} to "
+                  f"{last['PeriodYear']}-{last['PeriodMonth']}")
 
         return df_eom
 
+    def merge_with_cache(self, cached, df_eom):
+        """
+        Merge freshly fetched monthly FX rates into the cached series.
+
+        Args:
+            cached: Previously saved monthly FX data
+            df_eom: Newly processed monthly FX data (overrides cached months it covers)
+
+        Returns:
+            DataFrame with the combined monthly series in period order
+        """
+        import pandas as pd
+
+        merged = pd.concat([cached, df_eom], ignore_index=True)
+        merged = merged.drop_duplicates(subset=["PeriodYear", "PeriodMonth"], keep="last")
+        merged = merged.sort_values(["PeriodYear", "PeriodMonth"]).reset_index(drop=True)
+        print(f"  -> Merged with cache: {len(merged)} monthly FX rates "
+              f"({len(merged) - len(cached)} new)")
+        return merged
+
     def validate_data(self, df):
         """
         Validate the processed FX data.
@@ -172,10 +322,11 @@ class BanxicoFXAgent:
         if min_fx < 1 or max_fx > 30:
             raise ValueError(f"FX rates outside expected range: {min_fx:.2f} to {max_fx:.2f}")
 
-        # Check for duplicate months
-        duplicates = df.duplicated(subset=["PeriodYear", "PeriodMonth"], keep=False)
-        if duplicates.any():
-            dup_periods = df[duplicates][["PeriodYear", "PeriodMonth"]].values
+        # Check for duplicate months (full keep=False mask only built for the error report)
+        period_cols = ["PeriodYear", "PeriodMonth"]
+        if df.duplicated(subset=period_cols).any():
+            duplicates = df.duplicated(subset=period_cols, keep=False)
+            dup_periods = df.loc[duplicates, period_cols].values
             raise ValueError(f"Duplicate periods found: {dup_periods}")
 
         print(f"  -> Validation passed (FX range: {min_fx:.2f} to {max_fx:.2f} MXN/USD)")
@@ -188,20 +339,32 @@ class BanxicoFXAgent:
         Args:
             df: DataFrame with FX data
         """
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
-
-        df.to_json(self.output_path, orient="records", indent=2, force_ascii=False)
+        # Ensure output directory exists (once per agent)
+        if not self._dir_ensured:
+            output_dir = os.path.dirname(self.output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            self._dir_ensured = True
+
+        records = df.to_dict(orient="records")
+        with open(self.output_path, "wb") as f:
+            f.write(orjson.dumps(records, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         file_size = os.path.getsize(self.output_path) / 1024
         print(f"\n✅ FX data saved to: {self.output_path}")
         print(f"   File size: {file_size:.1f} KB")
 
-    def run(self, force_refresh=False):
+    def run(self, force_refresh=False, full_refresh=False):
         """
         Execute the complete FX data scraping pipeline.
 
+        When an expired cache is refreshed, only observations from its last month
+        onwards are requested and merged into it (that month may have been saved
+        mid-month). A forced refresh always downloads the full history.
+
         Args:
-            force_refresh: If True, ignore cache and fetch fresh data
+            force_refresh: If True, ignore cache and fetch the full history
+            full_refresh: If True, download the full history instead of updating an
+                expired cache
         """
         print("=" * 70)
         print("Banxico FX Data Scraper")
@@ -209,19 +372,27 @@ class BanxicoFXAgent:
         print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
         # Check cache
-        if not force_refresh and not self.should_refresh():
-            file_age = (time.time() - os.path.getmtime(self.output_path)) / 3600
+        file_age = self._stat_age()
+        if not force_refresh and not self.should_refresh(file_age):
             print(f"ℹ️  Using cached data (age: {file_age:.1f} hours)")
             print(f"   File: {self.output_path}")
             print(f"\n   Use force_refresh=True to fetch fresh data")
             return
 
         try:
-            # Fetch raw data
-            df = self.fetch_data()
+            # Fetch raw data (incrementally when updating an expired, usable cache)
+            incremental = not (force_refresh or full_refresh) and file_age is not None
+            cached = self.load_cached() if incremental else None
+            start_date = None
+            if cached is not None:
+                last_year, last_month = max(zip(cached["PeriodYear"].astype(int), cached["PeriodMonth"].astype(int)))
+                start_date = datetime(last_year, last_month, 1)
+            series_data = self.fetch_data(start_date)
 
             # Process data
-            df_eom = self.process_data(df)
+            df_eom = self.process_data(series_data)
+            if cached is not None:
+                df_eom = self.merge_with_cache(cached, df_eom)
 
             # Validate data
             self.validate_data(df_eom)
@@ -242,7 +413,9 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Fetch USD/MXN exchange rates from Banxico")
-    parser.add_argument("--force", action="store_true", help="Force refresh, ignore cache")
+    parser.add_argument("--force", action="store_true", help="Force refresh, ignore cache and download the full history")
+    parser.add_argument("--full", action="store_true",
+                        help="When the cache has expired, download the full history instead of updating it")
     parser.add_argument("--token", help="Banxico API token (or set BANXICO_TOKEN env var)")
     parser.add_argument("--output", default="/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/2025_10 files/fx_data.json",
                         help="Output JSON file path")
@@ -251,10 +424,9 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    agent = BanxicoFXAgent(
+    with BanxicoFXAgent(
         output_path=args.output,
         token=args.token,
         cache_hours=args.cache_hours
-    )
-
-    agent.run(force_refresh=args.force)
+    ) as agent:
+        agent.run(force_refresh=args.force, full_refresh=args.full)
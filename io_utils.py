@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Shared I/O Helpers
+==================
+Cached loaders for the JSON/Parquet record files shared by the pipeline and the
+analysis scripts, so a file is parsed at most once per process, and readers for
+the Reporte-*.xlsx workbooks used by the rebuild and the exploration scripts.
+"""
+
+import os
+from functools import lru_cache
+
+import orjson
+import pandas as pd
+
+# Repeated text label columns of the record files
+LABEL_COLUMNS = ("Afore", "Siefore", "Concept")
+
+
+@lru_cache(maxsize=4)
+def _read_records(path, mtime_ns):
+    """
+    Parses a records file into a DataFrame (cached per path and modification time).
+
+    Args:
+        path: Path to a .parquet file or a JSON array of records
+        mtime_ns: File modification time, so a rewritten file is parsed again
+
+    Returns:
+        DataFrame with the file contents
+    """
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+
+    with open(path, "rb") as f:
+        return pd.DataFrame.from_records(orjson.loads(f.read()))
+
+
+def _mtime_ns_or_none(path):
+    """Returns the file's modification time in ns, or None if it does not exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def load_records(path):
+    """
+    Loads a records file, preferring an up-to-date Parquet copy saved next to a JSON file.
+
+    Args:
+        path: Path to a JSON records file (or directly to a .parquet file)
+
+    Returns:
+        DataFrame with the records (a copy, safe for the caller to modify)
+
+    Raises:
+        FileNotFoundError: If neither the file nor its Parquet copy exists
+    """
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    mtime_ns = _mtime_ns_or_none(path)
+    parquet_mtime_ns = _mtime_ns_or_none(parquet_path)
+
+    # The Parquet copy is only used when it is at least as new as the requested file
+    if parquet_mtime_ns is not None and (mtime_ns is None or parquet_mtime_ns >= mtime_ns):
+        path, mtime_ns = parquet_path, parquet_mtime_ns
+    elif mtime_ns is None:
+        raise FileNotFoundError(f"No such file: {path}")
+
+    return _read_records(path, mtime_ns).copy()
+
+
+def as_categorical(df, columns=LABEL_COLUMNS):
+    """
+    Casts label columns to categoricals, so groupbys and value counts hash int codes.
+
+    Records loaded from Parquet already carry categorical labels; this covers the
+    JSON fallback and drops categories left unused after filtering.
+
+    Args:
+        df: DataFrame of records (modified in place)
+        columns: Label columns to cast
+
+    Returns:
+        The same DataFrame
+    """
+    for col in columns:
+        df[col] = df[col].astype("category").cat.remove_unused_categories()
+    return df
+
+
+def read_report(file_path, header=0):
+    """
+    Reads the first sheet of a Reporte Excel file using the fast calamine (Rust) engine.
+
+    The workbook is opened through a pd.ExcelFile handle; code that needs more than
+    one sheet (or several header layouts) should parse them from a single handle.
+
+    Args:
+        file_path: Path to the Excel file
+        header: Row number (0-based) to use as column headers, or None
+
+    Returns:
+        DataFrame with the sheet contents
+    """
+    with pd.ExcelFile(file_path, engine="calamine") as xf:
+        return xf.parse(sheet_name=0, header=header)
+
+
+def read_excel_cached(path, header=0):
+    """
+    Reads the first sheet of a Reporte workbook, reusing a sidecar copy across runs.
+
+    The sheet is parsed with read_report and pickled next to the workbook; the
+    copy is reloaded while it is at least as new as the workbook and was written
+    by the same pandas version. Pickle (not Parquet) keeps the mixed
+    number/text value columns and the Timestamp date headers exactly as parsed.
+    Unpickling runs arbitrary code, so sidecars are only for trusted local files;
+    an unreadable sidecar is ignored and the workbook parsed again.
+
+    Args:
+        path: Path to the .xlsx file
+        header: Row number (0-based) to use as column headers, or None
+
+    Returns:
+        DataFrame with the sheet contents
+    """
+    sidecar = f"{path}.h{header}.pd{pd.__version__}.pkl"
+    if os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(path):
+        try:
+            return pd.read_pickle(sidecar)
+        except Exception:
+            pass
+
+    df = read_report(path, header=header)
+    df.to_pickle(sidecar)
+    return df
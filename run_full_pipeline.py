@@ -17,20 +17,27 @@ import sys
 import os
 from datetime import datetime
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import our pipeline modules
-from cleanup_afore_json import main as rebuild_database
-from fetch_banxico_fx import BanxicoFXAgent
-from enrich_with_usd import USDEnrichmentAgent
+# Pipeline modules are imported inside each step, so skipped steps (and cached
+# FX data) never load their heavy dependencies
+
+
+def _stat_or_none(path):
+    """Return os.stat(path), or None if the file does not exist (one syscall)."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
 
 
 class PipelineOrchestrator:
     """Orchestrates the complete data pipeline."""
 
-    def __init__(self, base_path, skip_rebuild=False, skip_fx=False, force_fx=False):
+    def __init__(self, base_path, skip_rebuild=False, skip_fx=False, force_fx=False, full_fx=False):
         """
         Initialize the pipeline orchestrator.
 
@@ -38,12 +45,15 @@ class PipelineOrchestrator:
             base_path: Base directory path
             skip_rebuild: Skip database rebuild if output exists
             skip_fx: Skip FX fetch if output exists
-            force_fx: Force FX refresh even if cached
+            force_fx: Force FX refresh even if cached (downloads the full history)
+            full_fx: Download the full FX history when the cache has expired,
+                instead of only the months since the cached data
         """
         self.base_path = base_path
         self.skip_rebuild = skip_rebuild
         self.skip_fx = skip_fx
         self.force_fx = force_fx
+        self.full_fx = full_fx
 
         # Define file paths
         self.afore_db_path = os.path.join(base_path, "consar_siefores_full.json")
@@ -60,15 +70,17 @@ class PipelineOrchestrator:
         """Step 1: Build base Afore database from Excel files."""
         self.print_header("1/3 - Rebuild Afore Database")
 
-        if self.skip_rebuild and os.path.exists(self.afore_db_path):
+        st = _stat_or_none(self.afore_db_path) if self.skip_rebuild else None
+        if st is not None:
             print(f"ℹ️  Skipping database rebuild (file exists)")
             print(f"   Using: {self.afore_db_path}")
-            file_size = os.path.getsize(self.afore_db_path) / (1024 * 1024)
+            file_size = st.st_size / (1024 * 1024)
             print(f"   Size: {file_size:.2f} MB")
             return True
 
         try:
             print("Running cleanup_afore_json.py...")
+            from cleanup_afore_json import main as rebuild_database
             rebuild_database()
             print("\n✅ Step 1 completed: Database rebuilt successfully")
             return True
@@ -80,20 +92,22 @@ class PipelineOrchestrator:
         """Step 2: Fetch FX rates from Banxico."""
         self.print_header("2/3 - Fetch Banxico FX Data")
 
-        if self.skip_fx and os.path.exists(self.fx_data_path) and not self.force_fx:
+        st = _stat_or_none(self.fx_data_path) if self.skip_fx and not self.force_fx else None
+        if st is not None:
             print(f"ℹ️  Skipping FX data fetch (file exists)")
             print(f"   Using: {self.fx_data_path}")
-            file_size = os.path.getsize(self.fx_data_path) / 1024
+            file_size = st.st_size / 1024
             print(f"   Size: {file_size:.1f} KB")
             return True
 
         try:
             print("Running fetch_banxico_fx.py...")
-            agent = BanxicoFXAgent(
+            from fetch_banxico_fx import BanxicoFXAgent
+            with BanxicoFXAgent(
                 output_path=self.fx_data_path,
                 cache_hours=24
-            )
-            agent.run(force_refresh=self.force_fx)
+            ) as agent:
+                agent.run(force_refresh=self.force_fx, full_refresh=self.full_fx)
             print("\n✅ Step 2 completed: FX data fetched successfully")
             return True
         except Exception as e:
@@ -106,6 +120,7 @@ class PipelineOrchestrator:
 
         try:
             print("Running enrich_with_usd.py...")
+            from enrich_with_usd import USDEnrichmentAgent
             agent = USDEnrichmentAgent(
                 afore_data_path=self.afore_db_path,
                 fx_data_path=self.fx_data_path,
@@ -132,8 +147,9 @@ class PipelineOrchestrator:
 
         all_exist = True
         for name, path in files_to_check:
-            if os.path.exists(path):
-                size_mb = os.path.getsize(path) / (1024 * 1024)
+            st = _stat_or_none(path)
+            if st is not None:
+                size_mb = st.st_size / (1024 * 1024)
                 print(f"✓ {name:20} : {size_mb:.2f} MB")
             else:
                 print(f"✗ {name:20} : NOT FOUND")
@@ -151,19 +167,28 @@ class PipelineOrchestrator:
 
         start_time = datetime.now()
 
-        # Execute pipeline steps
+        # Execute pipeline steps: 1 and 2 are independent and run concurrently,
+        # step 3 needs both outputs
         steps = [
             ("Rebuild Database", self.step1_rebuild_database),
             ("Fetch FX Data", self.step2_fetch_fx_data),
             ("Enrich with USD", self.step3_enrich_with_usd)
         ]
 
-        for i, (name, step_func) in enumerate(steps, 1):
-            success = step_func()
-            if not success:
+        # Log lines from the two concurrent steps may interleave
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(step_func) for _, step_func in steps[:2]]
+
+        for i, ((name, _), future) in enumerate(zip(steps, futures), 1):
+            if not future.result():
                 print(f"\n❌ Pipeline failed at step {i}: {name}")
                 return False
 
+        name, step_func = steps[2]
+        if not step_func():
+            print(f"\n❌ Pipeline failed at step 3: {name}")
+            return False
+
         # Verify outputs
         if not self.verify_outputs():
             print("\n⚠️  Warning: Some output files are missing")
@@ -201,6 +226,9 @@ Examples:
   # Force fresh FX data
   python run_full_pipeline.py --force-fx
 
+  # Re-download the full FX history when the cache has expired
+  python run_full_pipeline.py --full-fx
+
   # Skip both rebuild and FX fetch (only enrich)
   python run_full_pipeline.py --skip-rebuild --skip-fx
         """
@@ -212,6 +240,8 @@ Examples:
                         help="Skip FX data fetch if output file exists")
     parser.add_argument("--force-fx", action="store_true",
                         help="Force fresh FX data fetch, ignore cache")
+    parser.add_argument("--full-fx", action="store_true",
+                        help="Download the full FX history instead of updating an expired cache")
     parser.add_argument("--base-path", default="/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup",
                         help="Base directory path (default: current project directory)")
 
@@ -222,7 +252,8 @@ Examples:
         base_path=args.base_path,
         skip_rebuild=args.skip_rebuild,
         skip_fx=args.skip_fx,
-        force_fx=args.force_fx
+        force_fx=args.force_fx,
+        full_fx=args.full_fx
     )
 
     success = orchestrator.run()
@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
 
+from cleanup_afore_json import parse_period_header, parse_values_mxn
+from io_utils import read_excel_cached
+
 # === CONFIGURATION ===
 file_path = "/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/2025_10 files/Reporte-16.xlsx"
 siefore_name = "Pensiones"
@@ -16,44 +20,45 @@ first_value_col = 4   # Column E (numeric data starts here)
 num_preview_cols = 5  # Only show first few months for inspection
 
 # === READ FILE ===
-df = pd.read_excel(file_path, header=header_row)
-df.columns = [str(c).strip() for c in df.columns]
+df = read_excel_cached(file_path, header=header_row)
+df.columns = df.columns.astype(str).str.strip()
 
 date_cols = df.columns[first_value_col : first_value_col + num_preview_cols]
-all_records = []
+
+# Parse each preview header once and keep only the real date columns
+dates = pd.DatetimeIndex([parse_period_header(col) for col in date_cols])
+keep = dates.notna()
+dates = dates[keep]
+
+# Cast and lowercase the concept label column once for all concept searches
+labels = df.iloc[:, 1].fillna("").astype(str).str.lower()
+all_blocks = []
 
 for concept in concepts_to_test:
-    concept_idx = df[df.iloc[:, 1].astype(str).str.contains(concept, case=False, na=False)]
-    if concept_idx.empty:
+    matches = np.flatnonzero(labels.str.contains(concept.lower(), regex=False).to_numpy())
+    if matches.size == 0:
         print(f"⚠️ Concept '{concept}' not found in {siefore_name}. Skipping...")
         continue
 
-    concept_row = concept_idx.index[0]
+    concept_row = matches[0]
     afore_block = df.iloc[concept_row + 1 : concept_row + 1 + num_afores, :]
     afore_names = afore_block.iloc[:, 1].fillna("").str.strip()
 
-    for i, afore in enumerate(afore_names):
-        row = afore_block.iloc[i, first_value_col : first_value_col + num_preview_cols]
-        for col, val in row.items():
-            date = pd.to_datetime(col, dayfirst=True, errors="coerce")
-            if pd.notna(date):
-                val_str = str(val).replace(",", "").strip()
-                try:
-                    value_mxn = float(val_str) * 1000 if val_str not in ["N/A", "-", "", "nan", "None"] else 0.0
-                except Exception:
-                    value_mxn = 0.0
-
-                all_records.append({
-                    "Afore": afore,
-                    "Siefore": siefore_name,
-                    "Concept": concept,
-                    "PeriodYear": date.year,
-                    "PeriodMonth": str(date.month).zfill(2),
-                    "valueMXN": value_mxn
-                })
+    vals = afore_block.iloc[:, first_value_col : first_value_col + num_preview_cols].iloc[:, keep]
+    values_mxn = parse_values_mxn(vals)  # N/A or missing -> 0, thousands -> pesos
+
+    n_afores, n_dates = values_mxn.shape
+    all_blocks.append(pd.DataFrame({
+        "Afore": np.repeat(afore_names.to_numpy(dtype=object), n_dates),
+        "Siefore": siefore_name,
+        "Concept": concept,
+        "PeriodYear": np.tile(dates.year, n_afores),
+        "PeriodMonth": np.tile(dates.month, n_afores),
+        "valueMXN": values_mxn.ravel()
+    }))
 
 # === OUTPUT PREVIEW ===
-preview_df = pd.DataFrame(all_records)
+preview_df = pd.concat(all_blocks, ignore_index=True)
 print("✅ Extraction test complete.")
 print(f"Concepts extracted: {preview_df['Concept'].unique().tolist()}")
 print(f"Rows extracted: {len(preview_df)}")
@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
 
+from cleanup_afore_json import parse_period_header, parse_values_mxn
+from io_utils import read_excel_cached
+
 # === CONFIGURATION ===
 file_path = "/Users/lvc/AI Scripts/2025_10 Afore JSON cleanup/2025_10 files/Reporte-16.xlsx"
 siefore_name = "Pensiones"
@@ -11,8 +15,12 @@ first_value_col = 4     # Column E = index 4
 start_date = pd.Timestamp("2024-08-01")
 
 # === READ FILE ===
-df = pd.read_excel(file_path, header=header_row)
-df.columns = [str(c).strip() for c in df.columns]
+df = read_excel_cached(file_path, header=header_row)
+
+# Parse the date headers once, before they are stringified: Timestamp headers
+# pass straight through and only text headers (e.g. "Ago-2025") need parsing
+dates = pd.DatetimeIndex([parse_period_header(col) for col in df.columns[first_value_col:]])
+df.columns = df.columns.astype(str).str.strip()
 
 # Identify "Total de Activo"
 concept_idx = df[df.iloc[:, 1].astype(str).str.contains(concept_target, case=False, na=False)].index[0]
@@ -21,32 +29,23 @@ afore_block = df.iloc[concept_idx + 1 : concept_idx + 1 + num_afores, :]
 # Get Afore names
 afore_names = afore_block.iloc[:, 1].fillna("").str.strip()
 
-# Identify numeric/date columns
-date_cols = df.columns[first_value_col:]
+# Keep the numeric/date columns in the preview window
+keep = dates.notna() & (dates >= start_date)
+dates = dates[keep]
 
 # === PARSE VALUES ===
-records = []
-for i, afore in enumerate(afore_names):
-    row = afore_block.iloc[i, first_value_col:]
-    for col, val in row.items():
-        date = pd.to_datetime(col, dayfirst=True, errors="coerce")
-        if pd.notna(date) and date >= start_date:
-            # Convert N/A or missing to 0
-            try:
-                val_clean = str(val).replace(",", "").strip()
-                value_mxn = float(val_clean) * 1000 if val_clean not in ["N/A", "-", "", "nan", "None"] else 0.0
-            except Exception:
-                value_mxn = 0.0
-
-            records.append({
-                "Afore": afore,
-                "Siefore": siefore_name,
-                "Concept": concept_target,
-                "PeriodYear": date.year,
-                "PeriodMonth": str(date.month).zfill(2),
-                "valueMXN": value_mxn
-            })
+# N/A or missing -> 0, thousands -> pesos (same cleaning as the full rebuild)
+values_mxn = parse_values_mxn(afore_block.iloc[:, first_value_col:].iloc[:, keep])
+
+n_afores, n_dates = values_mxn.shape
+preview_df = pd.DataFrame({
+    "Afore": np.repeat(afore_names.to_numpy(dtype=object), n_dates),
+    "Siefore": siefore_name,
+    "Concept": concept_target,
+    "PeriodYear": np.tile(dates.year, n_afores),
+    "PeriodMonth": np.tile(dates.month, n_afores),
+    "valueMXN": values_mxn.ravel()
+})
 
 # === OUTPUT PREVIEW ===
-preview_df = pd.DataFrame(records)
 print(preview_df.head(20))